@@ -0,0 +1,179 @@
+"""
+Offline end-to-end benchmark: runs `create_coding_crew` against a ReplayResponder answering
+from a recording (captured with MQTT_RECORD_FILE) and reports per-task wall time, request
+counts and bytes.
+
+    python benchmark.py --recording exchanges.jsonl --latency 0.05
+    python benchmark.py --recording exchanges.jsonl --broker localhost   # via local mosquitto
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from mqtt_handler import MQTTHandler
+from replay_harness import LoopbackBroker, Recording, ReplayResponder, create_paho_client
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the coding crew end-to-end against a recorded LLM/stakeholder session.")
+    parser.add_argument("--recording", required=True, help="JSON lines file written via MQTT_RECORD_FILE.")
+    parser.add_argument("--latency", default="0",
+                        help="Simulated response latency in seconds, or 'recorded' to replay the recorded durations.")
+    parser.add_argument("--broker", default="",
+                        help="MQTT broker host (e.g. a local mosquitto). Uses the embedded in-process broker if omitted.")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--connect-timeout", type=float, default=30,
+                        help="Seconds to wait for the broker connection and responder subscriptions.")
+    parser.add_argument("--workspace", default="",
+                        help="Directory the agents work in. A fresh temporary directory is used if omitted.")
+    parser.add_argument("--json", dest="json_path", default="", help="Also write the report as JSON to this path.")
+    parser.add_argument("--project-knowledge", action="store_true",
+                        help="Inject the project knowledge digest into the tasks. Off by default: with a reused "
+                             "--workspace the digest changes the prompts between runs, so recorded answers would "
+                             "no longer match exactly.")
+    return parser.parse_args(argv)
+
+
+def run_benchmark(args) -> dict:
+    request_topic = os.getenv("MQTT_TOPIC_REQUEST", "smarthomebobby/llm/request")
+    response_topic = os.getenv("MQTT_TOPIC_RESPONSE", "smarthomebobby/llm/response")
+    decision_request_topic = os.getenv("MQTT_TOPIC_DECISION_REQUEST", "smarthomebobby/crewai/decision/request")
+    decision_response_topic = os.getenv("MQTT_TOPIC_DECISION_RESPONSE", "smarthomebobby/crewai/decision/response")
+    project_goal = os.getenv("PROJECT_GOAL", "program an app for tracking chores for couples")
+    technical_details = os.getenv("TECHNICAL_DETAILS", "Follow general best practices.")
+
+    latency = None if args.latency == "recorded" else float(args.latency)
+    recording = Recording.load(args.recording)
+
+    mqtt_user = os.getenv("MQTT_USER", "")
+    mqtt_password = os.getenv("MQTT_PASSWORD", "")
+
+    if args.broker:
+        broker_host = args.broker
+        handler_client = None
+        responder_client = create_paho_client(f"crewai_replay_{uuid.uuid4().hex[:8]}", mqtt_user, mqtt_password)
+    else:
+        broker_host = "loopback"
+        loopback = LoopbackBroker()
+        handler_client = loopback.client()
+        responder_client = loopback.client()
+
+    responder = ReplayResponder(
+        recording,
+        responder_client,
+        request_topic=request_topic,
+        response_topic=response_topic,
+        decision_request_topic=decision_request_topic,
+        decision_response_topic=decision_response_topic,
+        latency=latency,
+        broker=broker_host,
+        port=args.port
+    )
+    mqtt = MQTTHandler(
+        broker=broker_host,
+        port=args.port,
+        user=mqtt_user,
+        password=mqtt_password,
+        llm_response_topic=response_topic,
+        decision_response_topic=decision_response_topic,
+        client=handler_client
+    )
+    responder.start()
+    mqtt.start()
+    if not mqtt.wait_until_connected(args.connect_timeout) or not responder.wait_until_ready(args.connect_timeout):
+        mqtt.stop()
+        responder.stop()
+        raise ConnectionError(f"Broker {broker_host}:{args.port} not ready after {args.connect_timeout}s")
+
+    workspace = args.workspace or tempfile.mkdtemp(prefix="crew_benchmark_")
+    os.makedirs(workspace, exist_ok=True)
+    if os.getcwd() not in sys.path:
+        sys.path.append(os.getcwd())
+    os.chdir(workspace)
+    logger.info(f"Benchmark workspace: {workspace}")
+
+    tasks = []
+    try:
+        from crew_setup import create_coding_crew
+        crew = create_coding_crew(
+            project_goal=project_goal,
+            technical_details=technical_details,
+            request_topic=request_topic,
+            decision_request_topic=decision_request_topic,
+            use_project_knowledge=args.project_knowledge
+        )
+
+        last = {"time": time.time(), "stats": dict(mqtt.stats)}
+
+        def make_callback(index, task, original):
+            def callback(task_output):
+                now = time.time()
+                stats = dict(mqtt.stats)
+                tasks.append({
+                    "task": index,
+                    "agent": getattr(task.agent, "role", "Unknown"),
+                    "wall_time": round(now - last["time"], 3),
+                    **{key: stats[key] - last["stats"][key] for key in stats}
+                })
+                last["time"], last["stats"] = now, stats
+                if original:
+                    return original(task_output)
+            return callback
+
+        for index, task in enumerate(crew.tasks):
+            task.callback = make_callback(index, task, task.callback)
+
+        start_time = time.time()
+        crew.kickoff()
+        total_time = time.time() - start_time
+    finally:
+        mqtt.stop()
+        responder.stop()
+
+    return {
+        "broker": broker_host,
+        "latency": args.latency,
+        "total_wall_time": round(total_time, 3),
+        "totals": dict(mqtt.stats),
+        "replay_misses": responder.misses,
+        "replay_fallback_matches": responder.fallback_matches,
+        "tasks": tasks
+    }
+
+
+def print_report(report: dict):
+    print(f"\nBroker: {report['broker']}  Latency: {report['latency']}  Replay misses: {report['replay_misses']}  "
+          f"Inexact replay matches: {report['replay_fallback_matches']}")
+    print(f"{'#':>2}  {'Agent':<30} {'Wall (s)':>9} {'LLM':>5} {'Decisions':>9} {'Sent (B)':>10} {'Recv (B)':>10}")
+    for t in report["tasks"]:
+        print(f"{t['task']:>2}  {t['agent'][:30]:<30} {t['wall_time']:>9.2f} {t['llm_requests']:>5} "
+              f"{t['decision_requests']:>9} {t['bytes_sent']:>10} {t['bytes_received']:>10}")
+    totals = report["totals"]
+    print(f"{'':>2}  {'Total':<30} {report['total_wall_time']:>9.2f} {totals['llm_requests']:>5} "
+          f"{totals['decision_requests']:>9} {totals['bytes_sent']:>10} {totals['bytes_received']:>10}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Resolve paths before run_benchmark changes into the workspace
+    args.recording = os.path.abspath(args.recording)
+    if args.json_path:
+        args.json_path = os.path.abspath(args.json_path)
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import logging
+from typing import Optional
 from crewai import Agent, Task, Crew, Process
 from crewai.tools import tool
 
 from mqtt_handler import MQTTHandler
 from mqtt_llm import MQTTLLM
 from command_tool import CommandExecutionTool
+from project_knowledge import ProjectKnowledgeStore, make_llm_summarizer
 
 logger = logging.getLogger(__name__)
 
@@ -12,10 +14,15 @@ def create_coding_crew(
     project_goal: str,
     technical_details: str,
     request_topic: str,
-    decision_request_topic: str
+    decision_request_topic: str,
+    use_project_knowledge: bool = True,
+    llm_summaries: bool = False,
+    knowledge_file: Optional[str] = None
 ) -> Crew:
     """
     Creates and returns a Crew configured to work on the given project goal.
+    With `use_project_knowledge`, a digest of the cached knowledge about the codebase in the
+    current working directory is injected into the tasks so agents don't rediscover it.
     """
     # 1. Initialize the MQTT Handler
     mqtt = MQTTHandler()
@@ -66,6 +73,20 @@ def create_coding_crew(
         except Exception as e:
             return f"Failed to write to {filepath}: {str(e)}"
 
+    # Refresh the cross-run knowledge store; only files changed since the last run are summarized.
+    # main.py refreshes it again after the run so the next run starts from this run's results.
+    knowledge_digest = ""
+    if use_project_knowledge:
+        try:
+            summarize = make_llm_summarizer(mqtt, request_topic) if llm_summaries else None
+            knowledge = ProjectKnowledgeStore(path=knowledge_file, summarize=summarize)
+            knowledge.refresh()
+            knowledge_digest = knowledge.digest()
+        except Exception as e:
+            # The cache only saves rediscovery work, the run must not depend on it
+            logger.error(f"Failed to refresh project knowledge, continuing without it: {e}")
+            knowledge_digest = ""
+
     dev_tools = [execution_tool, write_file]
     git_tools = [execution_tool, github_tool, git_commit_push]
 
@@ -129,13 +150,20 @@ def create_coding_crew(
     )
 
     # 5. Define Tasks
+    if knowledge_digest:
+        codebase_instruction = ("CRITICAL: A project codebase already exists and is summarized in the PROJECT KNOWLEDGE below. "
+                                "Rely on it instead of re-exploring the codebase with `ls -la`, and only read the specific files you need in full. "
+                                "Plan features or bug fixes rather than writing a brand new architecture.\n\n" + knowledge_digest)
+    else:
+        codebase_instruction = ("CRITICAL: First use your Terminal execution tool to run `ls -la` to check if a project codebase already exists! "
+                                "If the codebase exists, read the existing architecture and plan features or bug fixes rather than writing a brand new architecture.")
+
     planning_task = Task(
         description=f"Analyze the project goal: '{project_goal}'. Consider all these technical details: '{technical_details}'. "
                     "Decide on the tech stack (e.g. Flutter frontend, C# backend), database storage strategy, and API contracts. "
                     "Collaborate tightly with the Privacy Officer to establish a 'Need-to-Know' data handling policy from the start. "
                     "Ask the Product Owner for clarification on any missing product requirements regarding user onboarding or features. "
-                    "CRITICAL: First use your Terminal execution tool to run `ls -la` to check if a project codebase already exists! "
-                    "If the codebase exists, read the existing architecture and plan features or bug fixes rather than writing a brand new architecture.",
+                    + codebase_instruction,
         expected_output="A detailed architecture markdown document along with a clear setup script blueprint that respects privacy.",
         agent=software_architect
     )
@@ -147,7 +175,8 @@ def create_coding_crew(
                     "Only explicitly create any necessary directories using `mkdir` or frameworks (`flutter create .`, `dotnet new webapi`) if the project is completely empty. "
                     "Then implement the core features as defined by the architect or modify existing features if the codebase is already established. "
                     "Use your WriteFileTool to document specific developer decisions or API contracts in markdown files "
-                    "before writing the actual code. Finally, use your execution tool to BUILD and TEST the code constantly.",
+                    "before writing the actual code. Finally, use your execution tool to BUILD and TEST the code constantly."
+                    + (f"\n\n{knowledge_digest}" if knowledge_digest else ""),
         expected_output="A fully built and compiling codebase with initial unit tests passing, along with markdown documentation of developer choices.",
         agent=senior_developer
     )
@@ -1,7 +1,7 @@
 #!/bin/bash
-# Ensure the output directory exists and is owned by crew_user so they can write files
-mkdir -p /app/generated_projects
-chown -R crew_user:crew_user /app/generated_projects
+# Ensure the output and crew state directories exist and are owned by crew_user so they can write files
+mkdir -p /app/generated_projects /app/crew_state
+chown -R crew_user:crew_user /app/generated_projects /app/crew_state
 
 # Disable flutter analytics as the correct user
 runuser -u crew_user -- flutter config --no-analytics >/dev/null 2>&1 || true
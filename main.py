@@ -1,10 +1,13 @@
+import time
+_process_start = time.time()
+
 import os
 import sys
 import logging
 from dotenv import load_dotenv
 
 from mqtt_handler import MQTTHandler
-from crew_setup import create_coding_crew
+# crew_setup (crewai, langchain) is imported on first use in main() so it can overlap the MQTT connect
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -26,8 +29,28 @@ def main():
     project_goal = os.getenv("PROJECT_GOAL", "program an app for tracking chores for couples")
     technical_details = os.getenv("TECHNICAL_DETAILS", "Follow general best practices.")
     
+    # Connect to MQTT in the background while the crew is imported and built
+    fast_startup = os.getenv("FAST_STARTUP", "false").lower() == "true"
+    connect_timeout = float(os.getenv("MQTT_CONNECT_TIMEOUT", "30"))
+    
+    # Cross-run knowledge cache of the existing codebase (see project_knowledge.py)
+    use_project_knowledge = os.getenv("PROJECT_KNOWLEDGE", "true").lower() == "true"
+    llm_summaries = os.getenv("PROJECT_KNOWLEDGE_LLM_SUMMARIES", "false").lower() == "true"
+    # Kept outside the agents' git working tree; docker-compose.yml points this at a mounted volume
+    knowledge_file = os.getenv("PROJECT_KNOWLEDGE_FILE", "") or None
+    
+    # Optional: capture all LLM/stakeholder exchanges for offline replay (see benchmark.py)
+    record_file = os.getenv("MQTT_RECORD_FILE", "")
+    
     logger.info("Starting localCodingCrewModule...")
     
+    recorder = None
+    if record_file:
+        from replay_harness import ExchangeRecorder
+        # Resolve before changing into the output directory below
+        recorder = ExchangeRecorder(os.path.abspath(record_file))
+        logger.info(f"Recording MQTT exchanges to {recorder.path}")
+    
     # Ensure agent file outputs land in the mounted volume instead of the /app script root
     output_dir = "/app/generated_projects"
     os.makedirs(output_dir, exist_ok=True)
@@ -43,19 +66,49 @@ def main():
         user=mqtt_user,
         password=mqtt_password,
         llm_response_topic=response_topic,
-        decision_response_topic=decision_response_topic
+        decision_response_topic=decision_response_topic,
+        recorder=recorder
     )
-    mqtt.start()
+    connect_start = time.time()
+    if fast_startup:
+        mqtt.start_async()
+    else:
+        mqtt.start()
+    
+    def wait_for_connection() -> float:
+        # Measured up to the broker's CONNACK in both modes so the breakdowns are comparable
+        if not mqtt.wait_until_connected(connect_timeout):
+            raise ConnectionError(f"MQTT connection not established after {connect_timeout}s")
+        return mqtt.connected_at - connect_start
     
     try:
+        if not fast_startup:
+            connect_time = wait_for_connection()
+        
         # 3. Initialize the Crew
+        import_start = time.time()
+        from crew_setup import create_coding_crew
+        import_time = time.time() - import_start
+        
         logger.info(f"Initializing Crew with goal: {project_goal}")
+        build_start = time.time()
         crew = create_coding_crew(
             project_goal=project_goal,
             technical_details=technical_details,
             request_topic=request_topic,
-            decision_request_topic=decision_request_topic
+            decision_request_topic=decision_request_topic,
+            use_project_knowledge=use_project_knowledge,
+            llm_summaries=llm_summaries,
+            knowledge_file=knowledge_file
         )
+        build_time = time.time() - build_start
+        
+        if fast_startup:
+            connect_time = wait_for_connection()
+        
+        logger.info(f"Startup took {time.time() - _process_start:.2f}s "
+                    f"({'overlapped' if fast_startup else 'serial'}): import {import_time:.2f}s, "
+                    f"connect {connect_time:.2f}s, crew build {build_time:.2f}s")
         
         # 4. Run the Crew AI Loop
         logger.info("Kicking off the CrewAI execution...")
@@ -64,6 +117,15 @@ def main():
         logger.info("CrewAI execution finished successfully:")
         logger.info(result)
         
+        if use_project_knowledge:
+            # Summarize what this run changed so the next run's digest is current
+            try:
+                from project_knowledge import ProjectKnowledgeStore, make_llm_summarizer
+                summarize = make_llm_summarizer(mqtt, request_topic) if llm_summaries else None
+                ProjectKnowledgeStore(path=knowledge_file, summarize=summarize).refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh project knowledge: {e}")
+        
     except KeyboardInterrupt:
         logger.info("Interrupted. Shutting down...")
     except Exception as e:
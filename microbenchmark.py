@@ -0,0 +1,311 @@
+"""
+Micro-benchmarks for the hot paths: `MQTTHandler.on_message` dispatch, response post-processing
+(`mqtt_llm.postprocess_response`) and publish / round-trip latency. Absolute rates and latencies are
+reported for information. The regression gate compares `*_relative` metrics (hot path speed relative
+to a fixed reference operation on the same data, measured back to back) against the stored baseline
+in benchmarks_baseline.json, so machine speed and load largely cancel out.
+
+    python microbenchmark.py                      # run and compare against the baseline
+    python microbenchmark.py --broker localhost   # measure latency against a local mosquitto
+    python microbenchmark.py --save-baseline      # record a new baseline
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import uuid
+from typing import Optional
+
+from mqtt_handler import MQTTHandler
+from mqtt_llm import postprocess_response
+from replay_harness import LoopbackBroker, Recording, ReplayResponder, create_paho_client
+
+logger = logging.getLogger(__name__)
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+
+REQUEST_TOPIC = "smarthomebobby/llm/request"
+RESPONSE_TOPIC = "smarthomebobby/llm/response"
+DECISION_REQUEST_TOPIC = "smarthomebobby/crewai/decision/request"
+DECISION_RESPONSE_TOPIC = "smarthomebobby/crewai/decision/response"
+
+# Gated metrics -> allowed relative drop against the baseline. All are speed ratios, higher is better.
+# Tolerances follow the run-to-run spread of the medians: the memory-bound passes over large strings are noisier.
+GATED_METRICS = {
+    "on_message_llm_relative": 0.2,
+    "on_message_decision_relative": 0.2,
+    "on_message_unknown_trace_relative": 0.2,
+    "postprocess_relative": 0.3,
+    "postprocess_stop_words_relative": 0.4,
+    "postprocess_json_array_relative": 0.3,
+}
+
+
+class _Message:
+    def __init__(self, topic: str, payload: bytes):
+        self.topic = topic
+        self.payload = payload
+
+
+def _elapsed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _measure(func, reference, count: float, repeat: int):
+    """
+    Runs `func` and `reference` back to back `repeat` times. Returns the best rate of `count`
+    operations per second of `func` and the median speed of `func` relative to `reference`.
+    """
+    best = 0.0
+    ratios = []
+    for _ in range(repeat):
+        reference_time = _elapsed(reference)
+        func_time = _elapsed(func)
+        best = max(best, count / func_time)
+        ratios.append(reference_time / func_time)
+    return best, statistics.median(ratios)
+
+
+def bench_on_message(handler: MQTTHandler, pending: int, messages: int, repeat: int) -> dict:
+    """Messages/sec through `on_message` with `pending` outstanding LLM and decision requests."""
+    trace_ids = [str(uuid.uuid4()) for _ in range(pending)]
+    handler.pending_requests = {t: {"event": threading.Event(), "response": None} for t in trace_ids}
+    handler.pending_decisions = {t: {"event": threading.Event(), "response": None} for t in trace_ids}
+
+    response_text = "Thought: I now know the final answer\nFinal Answer: " + "lorem ipsum " * 100
+    llm_msgs = []
+    decision_msgs = []
+    unknown_msgs = []
+    for i in range(messages):
+        trace_id = trace_ids[i % pending]
+        llm_msgs.append(_Message(handler.llm_response_topic, json.dumps(
+            {"TraceId": trace_id, "EventId": str(uuid.uuid4()), "Response": response_text}).encode("utf-8")))
+        decision_msgs.append(_Message(handler.decision_response_topic, json.dumps(
+            {"TraceId": str(uuid.uuid4()), "EventId": trace_id, "Answer": "Yes, do it."}).encode("utf-8")))
+        unknown_msgs.append(_Message(handler.llm_response_topic, json.dumps(
+            {"TraceId": str(uuid.uuid4()), "Response": response_text}).encode("utf-8")))
+
+    def run(msgs):
+        def inner():
+            for msg in msgs:
+                handler.on_message(None, None, msg)
+        return inner
+
+    def parse_only(msgs):
+        # Reference: just decoding the same payloads, the floor for any dispatch
+        def inner():
+            for msg in msgs:
+                json.loads(msg.payload.decode("utf-8"))
+        return inner
+
+    results = {}
+    for name, msgs in (("llm", llm_msgs), ("decision", decision_msgs), ("unknown_trace", unknown_msgs)):
+        rate, relative = _measure(run(msgs), parse_only(msgs), messages, repeat)
+        results[f"on_message_{name}_per_sec"] = rate
+        results[f"on_message_{name}_relative"] = relative
+    handler.pending_requests = {}
+    handler.pending_decisions = {}
+    return results
+
+
+def _large_response(size: int) -> str:
+    line = "The senior developer implemented the repository layer and verified the build output.\n"
+    body = line * max(1, size // len(line))
+    tool_input = json.dumps([{"command": "dotnet build", "cwd": "backend"}, {"command": "flutter test"}])
+    return f"Thought: I need to build the project.\n{body}Action: CommandExecutionTool\nAction Input: {tool_input}\n"
+
+
+def bench_postprocess(size: int, iterations: int, repeat: int) -> dict:
+    """Post-processing throughput on large responses, with and without stop words."""
+    response = _large_response(size)
+    json_array = json.dumps([{"filepath": "docs/ARCHITECTURE.md", "content": "x" * size}, {"filepath": "b.md"}])
+    stop = ["\nObservation:", "\nObservation", "Observation:"]
+    megabytes = len(response) * iterations / (1024 * 1024)
+
+    def run(text, stop_words):
+        def inner():
+            for _ in range(iterations):
+                postprocess_response(text, stop_words)
+        return inner
+
+    def scan(text):
+        # Reference: a single linear pass over the same text
+        def inner():
+            for _ in range(iterations):
+                text.count("\n")
+        return inner
+
+    def parse(text):
+        def inner():
+            for _ in range(iterations):
+                json.loads(text)
+        return inner
+
+    results = {}
+    results["postprocess_mb_per_sec"], results["postprocess_relative"] = \
+        _measure(run(response, None), scan(response), megabytes, repeat)
+    results["postprocess_stop_words_mb_per_sec"], results["postprocess_stop_words_relative"] = \
+        _measure(run(response, stop), scan(response), megabytes, repeat)
+    results["postprocess_json_array_per_sec"], results["postprocess_json_array_relative"] = \
+        _measure(run(json_array, stop), parse(json_array), iterations, repeat)
+    return results
+
+
+def bench_latency(handler: MQTTHandler, responder_client, requests: int, connect_timeout: float = 30) -> dict:
+    """Publish call latency and full `ask_llm` round trip against a zero-latency ReplayResponder."""
+    handler.start()
+    responder = ReplayResponder(
+        Recording([]),
+        responder_client,
+        request_topic=REQUEST_TOPIC,
+        response_topic=RESPONSE_TOPIC,
+        decision_request_topic=DECISION_REQUEST_TOPIC,
+        decision_response_topic=DECISION_RESPONSE_TOPIC,
+        latency=0.0,
+        broker=handler.broker,
+        port=handler.port
+    )
+    responder.start()
+
+    try:
+        if not handler.wait_until_connected(connect_timeout) or not responder.wait_until_ready(connect_timeout):
+            raise ConnectionError(f"Broker {handler.broker}:{handler.port} not ready after {connect_timeout}s")
+
+        publish_times = []
+        payload = json.dumps({"TraceId": str(uuid.uuid4()), "Request": "benchmark"})
+        for _ in range(requests):
+            start = time.perf_counter()
+            handler.client.publish("smarthomebobby/bench/noop", payload, qos=2)
+            publish_times.append((time.perf_counter() - start) * 1000)
+
+        round_trips = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            handler.ask_llm(REQUEST_TOPIC, "Benchmark prompt", timeout=10)
+            round_trips.append((time.perf_counter() - start) * 1000)
+    finally:
+        responder.stop()
+        handler.stop()
+
+    round_trips.sort()
+    return {
+        "publish_median_ms": statistics.median(publish_times),
+        "round_trip_median_ms": statistics.median(round_trips),
+        "round_trip_p95_ms": round_trips[int(len(round_trips) * 0.95) - 1],
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: Optional[float] = None) -> list:
+    """
+    Returns a list of (metric, baseline, current, change) tuples for gated metrics that dropped
+    beyond their tolerance, or beyond `tolerance` for all of them if given. A gated metric missing
+    from either side is reported too, with None for the missing value and the change.
+    """
+    regressions = []
+    for metric, allowed in GATED_METRICS.items():
+        current = results.get(metric)
+        previous = baseline.get(metric)
+        if not current or not previous:
+            regressions.append((metric, previous, current, None))
+            continue
+        change = (current - previous) / previous
+        if change < -(allowed if tolerance is None else tolerance):
+            regressions.append((metric, previous, current, change))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for MQTT dispatch and response post-processing.")
+    parser.add_argument("--broker", default="",
+                        help="MQTT broker host for the latency benchmarks. Uses the in-process loopback if omitted.")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--connect-timeout", type=float, default=30,
+                        help="Seconds to wait for the broker connection and responder subscriptions.")
+    parser.add_argument("--pending", type=int, default=5000, help="Number of pending TraceIds during dispatch.")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--response-size", type=int, default=256 * 1024, help="Size of the large response in bytes.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Round trips for the latency benchmarks.")
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--runs", type=int, default=3,
+                        help="Dispatch and post-processing benchmarks are run this often and the median is used.")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Allowed relative drop for every gated metric (0.2 = 20%%). Defaults to per-metric tolerances.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+
+    if args.broker:
+        user, password = os.getenv("MQTT_USER", ""), os.getenv("MQTT_PASSWORD", "")
+        handler = MQTTHandler(broker=args.broker, port=args.port, user=user, password=password,
+                              llm_response_topic=RESPONSE_TOPIC, decision_response_topic=DECISION_RESPONSE_TOPIC)
+        responder_client = create_paho_client(f"crewai_bench_{uuid.uuid4().hex[:8]}", user, password)
+        transport = "broker"
+    else:
+        loopback = LoopbackBroker()
+        handler = MQTTHandler(broker="loopback", port=args.port,
+                              llm_response_topic=RESPONSE_TOPIC, decision_response_topic=DECISION_RESPONSE_TOPIC,
+                              client=loopback.client())
+        responder_client = loopback.client()
+        transport = "loopback"
+
+    runs = []
+    for _ in range(args.runs):
+        run = bench_on_message(handler, args.pending, args.messages, args.repeat)
+        run.update(bench_postprocess(args.response_size, args.iterations, args.repeat))
+        runs.append(run)
+    results = {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+    results.update({f"{transport}_{k}": v for k, v in bench_latency(handler, responder_client, args.requests, args.connect_timeout).items()})
+
+    for metric, value in results.items():
+        gated = " (gated)" if metric in GATED_METRICS else ""
+        print(f"{metric:<45} {value:>14.3f}{gated}")
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+
+    if args.save_baseline:
+        stored["results"] = {**stored.get("results", {}), **results}
+        stored["machine"] = {"platform": platform.platform(), "python": sys.version.split()[0]}
+        stored["created"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not stored:
+        print("\nNo baseline found, run with --save-baseline to record one.")
+        return 0
+
+    regressions = compare(results, stored.get("results", {}), args.tolerance)
+    if not regressions:
+        print(f"\nNo regressions in gated metrics against baseline from {stored.get('created', 'unknown')}.")
+        return 0
+
+    print("\nRegressions in gated metrics:")
+    for metric, previous, current, change in regressions:
+        if change is None:
+            side = "baseline" if not previous else "results"
+            print(f"  {metric:<45} missing from {side}, re-record with --save-baseline if it was renamed")
+        else:
+            print(f"  {metric:<45} {previous:>14.3f} -> {current:>14.3f} ({change:+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
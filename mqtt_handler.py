@@ -26,7 +26,9 @@ class MQTTHandler:
         user="",
         password="",
         llm_response_topic="smarthomebobby/llm/response",
-        decision_response_topic="smarthomebobby/crewai/decision/response"
+        decision_response_topic="smarthomebobby/crewai/decision/response",
+        client=None,
+        recorder=None
     ):
         if self._initialized:
             return
@@ -43,15 +45,25 @@ class MQTTHandler:
         self.pending_requests = {}
         self.pending_decisions = {}
 
+        # Optional ExchangeRecorder (see replay_harness.py) capturing every completed exchange
+        self.recorder = recorder
+        self.stats = {"llm_requests": 0, "decision_requests": 0, "bytes_sent": 0, "bytes_received": 0}
+        self.connected = threading.Event()
+        self.connected_at = None
+
         self.client_id = f"crewai_agent_{uuid.uuid4().hex[:8]}"
 
-        try:
-            from paho.mqtt.client import CallbackAPIVersion
-            self.client = mqtt.Client(
-                CallbackAPIVersion.VERSION2, client_id=self.client_id, clean_session=True)
-        except Exception:
-            self.client = mqtt.Client(
-                client_id=self.client_id, clean_session=True)
+        if client is not None:
+            # Injected transport, e.g. the in-process LoopbackBroker used for offline benchmarks
+            self.client = client
+        else:
+            try:
+                from paho.mqtt.client import CallbackAPIVersion
+                self.client = mqtt.Client(
+                    CallbackAPIVersion.VERSION2, client_id=self.client_id, clean_session=True)
+            except Exception:
+                self.client = mqtt.Client(
+                    client_id=self.client_id, clean_session=True)
 
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
@@ -67,6 +79,16 @@ class MQTTHandler:
         self.client.connect(self.broker, self.port, 60)
         self.client.loop_start()
 
+    def start_async(self):
+        """Starts connecting in the background network loop; use wait_until_connected() before sending requests."""
+        logger.info(
+            f"Connecting to MQTT broker at {self.broker}:{self.port} in the background...")
+        self.client.connect_async(self.broker, self.port, 60)
+        self.client.loop_start()
+
+    def wait_until_connected(self, timeout: float = 30) -> bool:
+        return self.connected.wait(timeout)
+
     def stop(self):
         self.client.loop_stop()
         self.client.disconnect()
@@ -76,11 +98,14 @@ class MQTTHandler:
             logger.info("Connected to MQTT Broker successfully.")
             client.subscribe(self.llm_response_topic, qos=2)
             client.subscribe(self.decision_response_topic, qos=2)
+            self.connected_at = time.time()
+            self.connected.set()
         else:
             logger.error(f"Failed to connect, return code {rc}")
 
     def on_message(self, client, userdata, msg):
         try:
+            self.stats["bytes_received"] += len(msg.payload)
             payload = json.loads(msg.payload.decode('utf-8'))
 
             if msg.topic == self.llm_response_topic:
@@ -119,7 +144,11 @@ class MQTTHandler:
 
         logger.debug(
             f"Publishing LLM request to {topic} with trace_id {trace_id}")
-        self.client.publish(topic, json.dumps(payload), qos=2)
+        data = json.dumps(payload)
+        self.stats["llm_requests"] += 1
+        self.stats["bytes_sent"] += len(data.encode('utf-8'))
+        start_time = time.time()
+        self.client.publish(topic, data, qos=2)
 
         completed = event.wait(timeout)
 
@@ -128,7 +157,11 @@ class MQTTHandler:
                 resp = self.pending_requests[trace_id].get("response", {})
                 if resp is None:
                     return ""
-                return resp.get("Response", resp.get("response", ""))
+                response = resp.get("Response", resp.get("response", ""))
+                if self.recorder:
+                    self.recorder.record_llm(request_text, response, request_type, priority,
+                                             time.time() - start_time)
+                return response
             else:
                 logger.error(f"LLM request timed out after {timeout}s")
                 return ""
@@ -157,14 +190,21 @@ class MQTTHandler:
         self.pending_decisions[event_id] = {"event": event, "response": None}
 
         logger.info(f"Asking stakeholder: {question}")
-        self.client.publish(topic, json.dumps(payload), qos=2)
+        data = json.dumps(payload)
+        self.stats["decision_requests"] += 1
+        self.stats["bytes_sent"] += len(data.encode('utf-8'))
+        start_time = time.time()
+        self.client.publish(topic, data, qos=2)
 
         completed = event.wait(timeout)
 
         try:
             if completed:
                 resp = self.pending_decisions[event_id]["response"]
-                return resp.get("Answer", resp.get("answer", ""))
+                answer = resp.get("Answer", resp.get("answer", ""))
+                if self.recorder:
+                    self.recorder.record_decision(question, context, answer, time.time() - start_time)
+                return answer
             else:
                 logger.error(f"Stakeholder request timed out after {timeout}s")
                 return "Error: Stakeholder response timed out."
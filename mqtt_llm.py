@@ -1,4 +1,6 @@
+import json
 import logging
+import re
 from typing import Any, List, Optional
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import BaseMessage, AIMessage
@@ -7,6 +9,55 @@ from langchain_core.outputs import ChatResult, ChatGeneration
 logger = logging.getLogger(__name__)
 
 
+def postprocess_response(response: str, stop: Optional[List[str]] = None) -> str:
+    """
+    Cleans up a raw LLM response: enforces stop words and repairs hallucinated JSON arrays
+    in tool inputs. Kept separate from `MQTTLLM._generate` so it can be benchmarked in isolation.
+    """
+    # Manually enforce stop words since MQTT payload doesn't support them natively
+    if stop is not None and len(stop) > 0 and response:
+        first_stop_idx = len(response)
+        for stop_word in stop:
+            idx = response.find(stop_word)
+            if idx != -1 and idx < first_stop_idx:
+                first_stop_idx = idx
+        if first_stop_idx < len(response):
+            logger.debug(
+                f"Truncated response from len {len(response)} to {first_stop_idx} due to stop word")
+            response = response[:first_stop_idx]
+
+    # Fix hallucinated "Repaired JSON: " and JSON arrays
+    # 1. Remove "Repaired JSON:" prefix explicitly if it exists anywhere
+    response = response.replace("Repaired JSON:", "").strip()
+    
+    # 2. Check if the response contains Action Input: [...]
+    # The agent sometimes generates multiple list elements instead of one dict.
+    pattern = r"(Action Input:\s*)(\[.*?\])\s*(?=\n|$)"
+    match = re.search(pattern, response, flags=re.DOTALL)
+    if match:
+        prefix = match.group(1)
+        json_array_str = match.group(2)
+        try:
+            arr = json.loads(json_array_str)
+            if isinstance(arr, list) and len(arr) > 0 and isinstance(arr[0], dict):
+                first_obj_str = json.dumps(arr[0])
+                response = response[:match.start()] + prefix + first_obj_str + response[match.end():]
+        except json.JSONDecodeError:
+            pass
+            
+    # 3. Check if the entire response is just a JSON array (e.g. function calling hallucination)
+    response = response.strip()
+    if response.startswith("[") and response.endswith("]"):
+        try:
+            arr = json.loads(response)
+            if isinstance(arr, list) and len(arr) > 0 and isinstance(arr[0], dict):
+                response = json.dumps(arr[0])
+        except json.JSONDecodeError:
+            pass
+
+    return response
+
+
 class MQTTLLM(BaseChatModel):
     """
     Custom LangChain Chat Model wrapper that routes requests to an MQTT topic
@@ -47,50 +98,7 @@ class MQTTLLM(BaseChatModel):
         duration = time.time() - start_time
         logger.info(f"LLM response received. Took {duration:.2f} seconds.")
 
-        # Manually enforce stop words since MQTT payload doesn't support them natively
-        if stop is not None and len(stop) > 0 and response:
-            first_stop_idx = len(response)
-            for stop_word in stop:
-                idx = response.find(stop_word)
-                if idx != -1 and idx < first_stop_idx:
-                    first_stop_idx = idx
-            if first_stop_idx < len(response):
-                logger.debug(
-                    f"Truncated response from len {len(response)} to {first_stop_idx} due to stop word")
-                response = response[:first_stop_idx]
-
-        # Fix hallucinated "Repaired JSON: " and JSON arrays 
-        import re
-        import json
-        
-        # 1. Remove "Repaired JSON:" prefix explicitly if it exists anywhere
-        response = response.replace("Repaired JSON:", "").strip()
-        
-        # 2. Check if the response contains Action Input: [...]
-        # The agent sometimes generates multiple list elements instead of one dict.
-        pattern = r"(Action Input:\s*)(\[.*?\])\s*(?=\n|$)"
-        match = re.search(pattern, response, flags=re.DOTALL)
-        if match:
-            prefix = match.group(1)
-            json_array_str = match.group(2)
-            try:
-                arr = json.loads(json_array_str)
-                if isinstance(arr, list) and len(arr) > 0 and isinstance(arr[0], dict):
-                    first_obj_str = json.dumps(arr[0])
-                    response = response[:match.start()] + prefix + first_obj_str + response[match.end():]
-            except json.JSONDecodeError:
-                pass
-                
-        # 3. Check if the entire response is just a JSON array (e.g. function calling hallucination)
-        response = response.strip()
-        if response.startswith("[") and response.endswith("]"):
-            try:
-                arr = json.loads(response)
-                if isinstance(arr, list) and len(arr) > 0 and isinstance(arr[0], dict):
-                    response = json.dumps(arr[0])
-            except json.JSONDecodeError:
-                pass
-
+        response = postprocess_response(response, stop)
 
         generation = ChatGeneration(message=AIMessage(content=response))
         return ChatResult(generations=[generation])
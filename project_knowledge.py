@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import stat
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+SKIP_DIRS = {
+    ".git", ".dart_tool", ".gradle", ".idea", ".vscode", ".venv", "__pycache__",
+    "node_modules", "build", "bin", "obj", "Pods", "dist", "coverage"
+}
+TEXT_EXTENSIONS = {
+    ".md", ".txt", ".dart", ".cs", ".csproj", ".sln", ".json", ".yaml", ".yml", ".xml",
+    ".py", ".sh", ".sql", ".js", ".ts", ".html", ".css", ".gradle", ".kt", ".swift", ".toml"
+}
+MAX_FILE_BYTES = 200 * 1024
+MAX_FILES = 500
+MAX_SUMMARY_CHARS = 300
+STORE_FILENAME = "crew_knowledge.json"
+
+DECISION_NAME_HINTS = ("architecture", "decision", "adr", "design", "privacy", "policy", "readme")
+CONTRACT_NAME_HINTS = ("api", "contract", "openapi", "swagger", "endpoint")
+
+_DECLARATION_PATTERN = re.compile(
+    r"^\s*(?:(?:public|private|protected|internal|static|abstract|sealed|partial|async|export|final)\s+)*"
+    r"(?:class|interface|enum|record|struct|def|function|mixin|extension)\s+(\w+)",
+    re.MULTILINE
+)
+
+
+def extract_summary(path: str, content: str) -> str:
+    """
+    Cheap, LLM-free file summary: the title and first paragraph for markdown,
+    the top-level declarations for source files.
+    """
+    lines = content.splitlines()
+    if path.endswith(".md"):
+        title = next((l.lstrip("# ").strip() for l in lines if l.startswith("#")), "")
+        paragraph = []
+        for line in lines:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                if paragraph:
+                    break
+                continue
+            paragraph.append(stripped)
+        summary = f"{title}: {' '.join(paragraph)}" if title else " ".join(paragraph)
+    else:
+        names = _DECLARATION_PATTERN.findall(content)
+        if names:
+            summary = f"{len(lines)} lines, declares {', '.join(dict.fromkeys(names))}"
+        else:
+            summary = f"{len(lines)} lines"
+    if len(summary) > MAX_SUMMARY_CHARS:
+        summary = summary[:MAX_SUMMARY_CHARS - 3] + "..."
+    return summary
+
+
+def make_llm_summarizer(mqtt_handler, request_topic: str, max_chars: int = 8000,
+                        connect_timeout: float = 30, timeout: int = 120) -> Callable[[str, str], str]:
+    """
+    Returns a summarizer asking the LLM module for a short summary, falling back to `extract_summary`.
+    It waits for the broker connection at most once; after that, files are summarized without the
+    LLM until the connection is up. After the first empty or timed out reply, the remaining files
+    are summarized without the LLM.
+    """
+    waited = []
+    llm_failed = []
+
+    def summarize(path: str, content: str) -> str:
+        if llm_failed:
+            return extract_summary(path, content)
+        # With FAST_STARTUP the crew is built while the broker connection is still coming up
+        if not mqtt_handler.connected.is_set():
+            if waited:
+                return extract_summary(path, content)
+            waited.append(True)
+            if not mqtt_handler.wait_until_connected(connect_timeout):
+                logger.warning(f"MQTT not connected after {connect_timeout}s, summarizing files without the LLM")
+                return extract_summary(path, content)
+        prompt = (
+            f"Summarize the purpose and key contents (public types, endpoints, decisions) of the file '{path}' "
+            f"in at most two sentences. Reply with the summary only.\n\n{content[:max_chars]}"
+        )
+        summary = mqtt_handler.ask_llm(topic=request_topic, request_text=prompt, request_type=0,
+                                       priority=2, timeout=timeout).strip()
+        if not summary:
+            logger.warning(f"No LLM summary for {path} within {timeout}s, summarizing remaining files without the LLM")
+            llm_failed.append(True)
+            return extract_summary(path, content)
+        return summary[:MAX_SUMMARY_CHARS]
+    return summarize
+
+
+class ProjectKnowledgeStore:
+    """
+    Persistent per-project knowledge kept across runs: file summaries, architecture decisions
+    and API contracts, keyed by file content hash so only changed files are summarized again.
+
+    The store never lives in the agents' working tree, since `git add .` would push it. An explicit
+    `path` (PROJECT_KNOWLEDGE_FILE, a mounted volume in docker-compose.yml) is used as is. Otherwise
+    it is kept in the workspace's `.git/` directory once that exists, and next to the workspace before.
+    """
+
+    def __init__(self, workspace: str = ".", path: Optional[str] = None,
+                 summarize: Optional[Callable[[str, str], str]] = None):
+        self.workspace = os.path.abspath(workspace)
+        self._explicit_path = path
+        self.summarize = summarize or extract_summary
+        self.files = {}
+        self.load()
+
+    def _git_path(self) -> str:
+        return os.path.join(self.workspace, ".git", STORE_FILENAME)
+
+    def _sibling_path(self) -> str:
+        parent, name = os.path.split(self.workspace)
+        return os.path.join(parent, f".{name}_{STORE_FILENAME}")
+
+    @property
+    def path(self) -> str:
+        if self._explicit_path:
+            return self._explicit_path
+        if os.path.isdir(os.path.join(self.workspace, ".git")):
+            return self._git_path()
+        return self._sibling_path()
+
+    def load(self):
+        candidates = [self._explicit_path] if self._explicit_path else [self._git_path(), self._sibling_path()]
+        path = next((p for p in candidates if os.path.exists(p)), None)
+        if not path:
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+        except Exception as e:
+            logger.error(f"Failed to load project knowledge from {path}: {e}")
+            self.files = {}
+
+    def save(self):
+        data = {"updated": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "files": self.files}
+        path = self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def _iter_files(self):
+        count = 0
+        store_path = self.path
+        for root, dirs, files in os.walk(self.workspace):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() not in TEXT_EXTENSIONS:
+                    continue
+                full_path = os.path.join(root, name)
+                if full_path == store_path:
+                    continue
+                try:
+                    info = os.lstat(full_path)
+                except OSError:
+                    continue
+                # Skip symlinks (possibly dangling or pointing outside the workspace) and oversized files
+                if not stat.S_ISREG(info.st_mode) or info.st_size > MAX_FILE_BYTES:
+                    continue
+                yield full_path
+                count += 1
+                if count >= MAX_FILES:
+                    return
+
+    @staticmethod
+    def _classify(rel_path: str) -> str:
+        name = os.path.basename(rel_path).lower()
+        if any(hint in name for hint in CONTRACT_NAME_HINTS):
+            return "contract"
+        if name.endswith(".md") and any(hint in name for hint in DECISION_NAME_HINTS):
+            return "decision"
+        return "file"
+
+    def refresh(self) -> int:
+        """Re-hashes the workspace, summarizes new or changed files and drops deleted ones. Returns the number summarized."""
+        seen = set()
+        summarized = 0
+        for full_path in self._iter_files():
+            rel_path = os.path.relpath(full_path, self.workspace)
+            try:
+                with open(full_path, "rb") as f:
+                    raw = f.read()
+                content_hash = hashlib.sha256(raw).hexdigest()
+                seen.add(rel_path)
+                cached = self.files.get(rel_path)
+                if cached and cached.get("hash") == content_hash:
+                    continue
+                content = raw.decode("utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+            self.files[rel_path] = {
+                "hash": content_hash,
+                "kind": self._classify(rel_path),
+                "summary": self.summarize(rel_path, content)
+            }
+            summarized += 1
+
+        removed = [p for p in self.files if p not in seen]
+        for rel_path in removed:
+            del self.files[rel_path]
+
+        if summarized or removed:
+            self.save()
+        logger.info(f"Project knowledge refreshed: {summarized} summarized, {len(removed)} removed, {len(self.files)} cached.")
+        return summarized
+
+    def digest(self, max_chars: int = 6000) -> str:
+        """Compact text digest of the cached knowledge for injection into task descriptions."""
+        if not self.files:
+            return ""
+        sections = [("Architecture decisions", "decision"), ("API contracts", "contract"), ("Files", "file")]
+        lines = [f"PROJECT KNOWLEDGE (cached summaries of the {len(self.files)} files in the existing codebase):"]
+        for title, kind in sections:
+            entries = [(p, e["summary"]) for p, e in sorted(self.files.items()) if e.get("kind") == kind]
+            if entries:
+                lines.append(f"{title}:")
+                lines.extend(f"- {p}: {summary}" for p, summary in entries)
+
+        digest = ""
+        for line in lines:
+            if len(digest) + len(line) + 1 > max_chars:
+                digest += "- ... (truncated, read the files directly for more detail)\n"
+                break
+            digest += line + "\n"
+        return digest.rstrip()
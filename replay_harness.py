@@ -0,0 +1,328 @@
+import collections
+import hashlib
+import json
+import logging
+import queue
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LLM_FALLBACK = (
+    "Thought: I now know the final answer\n"
+    "Final Answer: Replay recording exhausted, no recorded response available for this prompt."
+)
+DEFAULT_DECISION_FALLBACK = "Proceed with your best judgement."
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ExchangeRecorder:
+    """
+    Appends every completed `ask_llm` / `ask_stakeholder` exchange to a JSON lines file,
+    one object per line, so a run can later be answered offline by the ReplayResponder.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _append(self, entry: dict):
+        # Recording is optional and must never change the answer returned to the agent
+        try:
+            with self._lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            logger.error(f"Failed to record exchange to {self.path}: {e}")
+
+    def record_llm(self, request: str, response: str, request_type: int, priority: int, duration: float):
+        self._append({
+            "kind": "llm",
+            "request_type": request_type,
+            "priority": priority,
+            "request": request,
+            "response": response,
+            "duration": round(duration, 3)
+        })
+
+    def record_decision(self, question: str, context: str, answer: str, duration: float):
+        self._append({
+            "kind": "decision",
+            "question": question,
+            "context": context,
+            "answer": answer,
+            "duration": round(duration, 3)
+        })
+
+
+class Recording:
+    """
+    A loaded recording. Answers are looked up by exact request text first and fall back
+    to the next unused entry of the same kind in recorded order, since prompts drift
+    slightly between runs (e.g. tool output containing timestamps).
+    """
+
+    def __init__(self, entries: list):
+        self._lock = threading.Lock()
+        self._by_key = collections.defaultdict(collections.deque)
+        self._in_order = {"llm": collections.deque(), "decision": collections.deque()}
+        for entry in entries:
+            kind = entry.get("kind")
+            if kind not in self._in_order:
+                continue
+            self._in_order[kind].append(entry)
+            self._by_key[(kind, _digest(self._request_text(entry)))].append(entry)
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+        return cls(entries)
+
+    @staticmethod
+    def _request_text(entry: dict) -> str:
+        if entry.get("kind") == "decision":
+            return entry.get("question", "")
+        return entry.get("request", "")
+
+    def next_entry(self, kind: str, request_text: str):
+        """
+        Returns `(entry, exact)`: the recorded entry to answer with (None once exhausted) and
+        whether it matched the request text exactly rather than being the next one in order.
+        """
+        with self._lock:
+            exact = self._by_key.get((kind, _digest(request_text)))
+            if exact:
+                entry = exact.popleft()
+                self._in_order[kind].remove(entry)
+                return entry, True
+            if self._in_order[kind]:
+                entry = self._in_order[kind].popleft()
+                self._by_key[(kind, _digest(self._request_text(entry)))].remove(entry)
+                return entry, False
+            return None, False
+
+
+class _LoopbackMessage:
+    def __init__(self, topic: str, payload: bytes):
+        self.topic = topic
+        self.payload = payload
+
+
+class LoopbackBroker:
+    """
+    Minimal in-process stand-in for an MQTT broker. Clients obtained from `client()` expose the
+    subset of the paho Client API used by MQTTHandler and ReplayResponder. Messages are delivered
+    on a single dispatch thread, mirroring paho's network loop thread.
+    Only exact topic matches are supported, which is all this module subscribes to.
+    """
+
+    def __init__(self):
+        self._subscriptions = collections.defaultdict(list)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def client(self) -> "LoopbackClient":
+        return LoopbackClient(self)
+
+    def _subscribe(self, client, topic: str):
+        with self._lock:
+            if client not in self._subscriptions[topic]:
+                self._subscriptions[topic].append(client)
+
+    def _unsubscribe_all(self, client):
+        with self._lock:
+            for subscribers in self._subscriptions.values():
+                if client in subscribers:
+                    subscribers.remove(client)
+
+    def _publish(self, topic: str, payload):
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        self._queue.put(_LoopbackMessage(topic, payload))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+                self._thread.start()
+
+    def _dispatch_loop(self):
+        while True:
+            msg = self._queue.get()
+            with self._lock:
+                subscribers = list(self._subscriptions.get(msg.topic, []))
+            for client in subscribers:
+                if client.on_message:
+                    try:
+                        client.on_message(client, None, msg)
+                    except Exception as e:
+                        logger.error(f"Loopback subscriber failed on {msg.topic}: {e}")
+
+
+class LoopbackClient:
+    def __init__(self, broker: LoopbackBroker):
+        self._broker = broker
+        self.on_connect = None
+        self.on_message = None
+        self.on_subscribe = None
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def connect(self, host=None, port=None, keepalive=60):
+        if self.on_connect:
+            self.on_connect(self, None, {}, 0, None)
+        return 0
+
+    def connect_async(self, host=None, port=None, keepalive=60):
+        self.connect(host, port, keepalive)
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        self._broker._unsubscribe_all(self)
+
+    def subscribe(self, topic, qos=0):
+        self._broker._subscribe(self, topic)
+        if self.on_subscribe:
+            self.on_subscribe(self, None, 1, [qos], None)
+        return (0, 1)
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self._broker._publish(topic, payload)
+
+
+def create_paho_client(client_id: str, user: str = "", password: str = ""):
+    import paho.mqtt.client as mqtt
+    try:
+        from paho.mqtt.client import CallbackAPIVersion
+        client = mqtt.Client(CallbackAPIVersion.VERSION2, client_id=client_id, clean_session=True)
+    except Exception:
+        client = mqtt.Client(client_id=client_id, clean_session=True)
+    if user and password:
+        client.username_pw_set(user, password)
+    return client
+
+
+class ReplayResponder:
+    """
+    Fake `localLLMAgentModule` and stakeholder: listens on the request topics and answers
+    from a Recording after a simulated latency. `latency` of None replays each entry's
+    recorded duration, otherwise it is a fixed delay in seconds.
+    """
+
+    def __init__(
+        self,
+        recording: Recording,
+        client,
+        request_topic="smarthomebobby/llm/request",
+        response_topic="smarthomebobby/llm/response",
+        decision_request_topic="smarthomebobby/crewai/decision/request",
+        decision_response_topic="smarthomebobby/crewai/decision/response",
+        latency=0.0,
+        broker="127.0.0.1",
+        port=1883
+    ):
+        self.recording = recording
+        self.client = client
+        self.request_topic = request_topic
+        self.response_topic = response_topic
+        self.decision_request_topic = decision_request_topic
+        self.decision_response_topic = decision_response_topic
+        self.latency = latency
+        self.broker = broker
+        self.port = port
+        # Requests answered with the built-in fallback because the recording was exhausted
+        self.misses = 0
+        # Requests without an exact match, answered with the next recorded entry in order
+        self.fallback_matches = 0
+        # Set once the broker has acknowledged both request topic subscriptions
+        self.ready = threading.Event()
+        self._subscription_acks = 0
+
+        self.client.on_connect = self.on_connect
+        self.client.on_message = self.on_message
+        self.client.on_subscribe = self.on_subscribe
+
+    def start(self):
+        logger.info(f"Starting replay responder on {self.broker}:{self.port}...")
+        self.client.connect(self.broker, self.port, 60)
+        self.client.loop_start()
+
+    def stop(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+    def wait_until_ready(self, timeout: float = 30) -> bool:
+        return self.ready.wait(timeout)
+
+    def on_connect(self, client, userdata, flags, rc, properties=None):
+        if rc == 0:
+            self._subscription_acks = 0
+            client.subscribe(self.request_topic, qos=2)
+            client.subscribe(self.decision_request_topic, qos=2)
+        else:
+            logger.error(f"Replay responder failed to connect, return code {rc}")
+
+    def on_subscribe(self, client, userdata, mid, *args):
+        # Signature differs between paho callback API versions, only the count matters here
+        self._subscription_acks += 1
+        if self._subscription_acks >= 2:
+            self.ready.set()
+
+    def on_message(self, client, userdata, msg):
+        try:
+            payload = json.loads(msg.payload.decode("utf-8"))
+            if msg.topic == self.request_topic:
+                entry, exact = self.recording.next_entry("llm", payload.get("Request", ""))
+                if entry is None:
+                    self.misses += 1
+                    answer = DEFAULT_LLM_FALLBACK
+                else:
+                    if not exact:
+                        self.fallback_matches += 1
+                    answer = entry.get("response", "")
+                reply = {"TraceId": payload.get("TraceId"), "EventId": str(uuid.uuid4()), "Response": answer}
+                self._respond(self.response_topic, reply, entry)
+
+            elif msg.topic == self.decision_request_topic:
+                entry, exact = self.recording.next_entry("decision", payload.get("Question", ""))
+                if entry is None:
+                    self.misses += 1
+                    answer = DEFAULT_DECISION_FALLBACK
+                else:
+                    if not exact:
+                        self.fallback_matches += 1
+                    answer = entry.get("answer", "")
+                reply = {"TraceId": payload.get("TraceId"), "EventId": payload.get("EventId"), "Answer": answer}
+                self._respond(self.decision_response_topic, reply, entry)
+
+        except Exception as e:
+            logger.error(f"Replay responder failed on {msg.topic}: {e}")
+
+    def _respond(self, topic: str, reply: dict, entry):
+        if self.latency is None:
+            delay = entry.get("duration", 0.0) if entry else 0.0
+        else:
+            delay = self.latency
+
+        def publish():
+            self.client.publish(topic, json.dumps(reply), qos=2)
+
+        if delay > 0:
+            timer = threading.Timer(delay, publish)
+            timer.daemon = True
+            timer.start()
+        else:
+            publish()